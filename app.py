@@ -6,14 +6,59 @@ Sans multi-stage complexe, focus sur les dépendances Python problématiques
 
 import os
 import time
+import socket
+import asyncio
+import hashlib
+import gzip
+import functools
+import itertools
 import psutil
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 from typing import Dict, Any
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+import anyio.to_thread
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse
+from pydantic import BaseModel, ConfigDict
 import uvicorn
-import requests
+
+# ===============================================
+# DÉPENDANCES PROBLÉMATIQUES
+# ===============================================
+def _probe_problematic_imports() -> Dict[str, bool]:
+    """Test des dépendances qui causent des problèmes sur Render avec requirements.txt"""
+    # FastAPI, Uvicorn et psutil sont importés en tête de module :
+    # si ce code s'exécute, ils sont chargés, inutile de les re-sonder
+    results = {"fastapi": True, "uvicorn": True}
+    
+    # Pydantic avec email validator
+    try:
+        from pydantic import EmailStr
+        results["pydantic"] = True
+    except ImportError:
+        results["pydantic"] = False
+    
+    # Python-multipart pour file uploads
+    try:
+        import multipart
+        results["python_multipart"] = True
+    except ImportError:
+        results["python_multipart"] = False
+    
+    # Requests pour API calls : import réel, une installation cassée doit apparaître ici
+    try:
+        import requests
+        results["requests"] = True
+    except ImportError:
+        results["requests"] = False
+    
+    results["psutil"] = True
+    
+    return results
+
+PROBLEMATIC_DEPENDENCIES = _probe_problematic_imports()
 
 # ===============================================
 # PREUVE DE CONCEPT ILN
@@ -24,113 +69,112 @@ class ILNProofOfConcept:
     def __init__(self):
         self.start_time = time.time()
         self.request_count = 0
+        # Identifiants d'événements monotones (uniques, sans appel horloge)
+        self._event_counter = itertools.count(1)
+        # Handle psutil réutilisé (cpu_percent a besoin du même objet entre deux appels)
+        self.process = psutil.Process()
+        self._process_metrics = self._sample_process_metrics()
+        # Table de dispatch essence_type -> méthode (type inconnu = orchestration Python)
+        self._essences = {
+            "secure": self._essence_secure,
+            "fast": self._essence_fast,
+            "reactive": self._essence_reactive,
+            "python": self._essence_python
+        }
         
-        # Test des imports qui échouent avec requirements.txt
-        self.problematic_dependencies = self._test_problematic_imports()
-        
-    def _test_problematic_imports(self) -> Dict[str, bool]:
-        """Test des dépendances qui causent des problèmes sur Render avec requirements.txt"""
-        results = {}
-        
-        # FastAPI avec toutes ses dépendances
-        try:
-            from fastapi import FastAPI
-            results["fastapi"] = True
-        except ImportError:
-            results["fastapi"] = False
-        
-        # Uvicorn avec extensions standard
-        try:
-            import uvicorn
-            results["uvicorn"] = True
-        except ImportError:
-            results["uvicorn"] = False
-        
-        # Pydantic avec email validator
-        try:
-            from pydantic import BaseModel, EmailStr
-            results["pydantic"] = True
-        except ImportError:
-            results["pydantic"] = False
-        
-        # Python-multipart pour file uploads
-        try:
-            import multipart
-            results["python_multipart"] = True
-        except ImportError:
-            results["python_multipart"] = False
+        # Test des imports qui échouent avec requirements.txt (fait une fois au chargement)
+        self.problematic_dependencies = PROBLEMATIC_DEPENDENCIES
+        # Réductions constantes, calculées une fois au lieu d'à chaque requête
+        self.total_dependencies = sum(self.problematic_dependencies.values())
+        self.concept_validated = all(self.problematic_dependencies.values())
         
-        # Requests pour API calls
-        try:
-            import requests
-            results["requests"] = True
-        except ImportError:
-            results["requests"] = False
-            
-        # psutil pour metrics système
-        try:
-            import psutil
-            results["psutil"] = True
-        except ImportError:
-            results["psutil"] = False
+    def _sample_process_metrics(self) -> Dict[str, float]:
+        """Lecture psutil (/proc), faite par le rafraîchisseur et non par les requêtes"""
+        process = self.process
         
-        return results
+        return {
+            "memory_usage_mb": round(process.memory_info().rss / 1024 / 1024, 2),
+            "cpu_percent": round(process.cpu_percent(), 2)
+        }
+    
+    async def refresh_metrics_forever(self, interval: float = 1.0):
+        """Rafraîchit les métriques psutil en tâche de fond, une lecture partagée par tous les clients"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Les appels système psutil ne s'exécutent pas dans le thread de la boucle
+                self._process_metrics = await asyncio.to_thread(self._sample_process_metrics)
+            except Exception as e:
+                # Erreur /proc transitoire : on garde le dernier échantillon et on continue
+                print(f"⚠️ Metrics refresh failed: {e}")
 
     def get_system_metrics(self) -> Dict[str, Any]:
         """Métriques système pour prouver que tout fonctionne"""
-        process = psutil.Process()
-        
         return {
-            "memory_usage_mb": round(process.memory_info().rss / 1024 / 1024, 2),
-            "cpu_percent": round(process.cpu_percent(), 2),
+            **self._process_metrics,
             "uptime_seconds": round(time.time() - self.start_time, 2),
             "requests_processed": self.request_count,
             "docker_managed_deps": self.problematic_dependencies
         }
     
+    def _essence_secure(self, data: str) -> Dict[str, Any]:
+        """Simulation Rust-style security"""
+        return {
+            "essence": "rust_security_simulation",
+            # 8 octets de digest = 16 caractères hex, sans construire les 64
+            "secure_hash": hashlib.sha256(data.encode()).digest()[:8].hex(),
+            "memory_safe": True
+        }
+    
+    def _essence_fast(self, data: str) -> Dict[str, Any]:
+        """Simulation Go-style performance"""
+        return {
+            "essence": "go_performance_simulation", 
+            "parallel_chunks": len(data.split()),
+            "concurrent_ready": True
+        }
+    
+    def _essence_reactive(self, data: str) -> Dict[str, Any]:
+        """Simulation JS-style reactivity"""
+        return {
+            "essence": "js_reactive_simulation",
+            "event_id": f"evt_{next(self._event_counter)}",
+            "async_ready": True
+        }
+    
+    def _essence_python(self, data: str) -> Dict[str, Any]:
+        """Python orchestration"""
+        return {
+            "essence": "python_orchestration",
+            "readable_processing": f"Processed {len(data)} characters",
+            "simple_and_powerful": True
+        }
+    
+    def warmup(self):
+        """Exécute chaque essence une fois (hashlib/OpenSSL compris) sans état visible modifié"""
+        for essence_type, essence in self._essences.items():
+            # L'essence réactive ne fait que construire un dict et consommerait evt_1
+            if essence_type != "reactive":
+                essence("warmup")
+    
     def simulate_iln_essence(self, data: str, essence_type: str) -> Dict[str, Any]:
         """Simule une essence ILN pour prouver le concept"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         self.request_count += 1
         
-        if essence_type == "secure":
-            # Simulation Rust-style security
-            import hashlib
-            result = {
-                "essence": "rust_security_simulation",
-                "secure_hash": hashlib.sha256(data.encode()).hexdigest()[:16],
-                "memory_safe": True
-            }
-        elif essence_type == "fast":
-            # Simulation Go-style performance
-            import threading
-            result = {
-                "essence": "go_performance_simulation", 
-                "parallel_chunks": len(data.split()),
-                "concurrent_ready": True
-            }
-        elif essence_type == "reactive":
-            # Simulation JS-style reactivity
-            result = {
-                "essence": "js_reactive_simulation",
-                "event_id": f"evt_{int(time.time() * 1000)}",
-                "async_ready": True
-            }
-        else:
-            # Python orchestration
-            result = {
-                "essence": "python_orchestration",
-                "readable_processing": f"Processed {len(data)} characters",
-                "simple_and_powerful": True
-            }
+        # Une seule recherche dans la table au lieu de la chaîne if/elif
+        result = self._essences.get(essence_type, self._essence_python)(data)
         
-        result["processing_time_ms"] = round((time.time() - start_time) * 1000, 2)
+        result["processing_time_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
         return result
 
 # ===============================================
 # MODELS
 # ===============================================
 class TestRequest(BaseModel):
+    # Mode strict : pas de coercition de types à la validation (pydantic v2)
+    model_config = ConfigDict(strict=True)
+    
     data: str
     essence_type: str = "python"
 
@@ -146,16 +190,70 @@ class TestResponse(BaseModel):
 # ===============================================
 iln_proof = ILNProofOfConcept()
 
+def _available_cpus() -> int:
+    """CPU utilisables dans le conteneur : quota cgroup v2 (--cpus, Render/Fly) puis affinité cpuset"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+# Taille commune aux deux pools : executor asyncio (to_thread/run_in_executor)
+# et limiteur anyio (routes def), qui garde ses propres threads
+THREAD_POOL_SIZE = int(os.environ.get("THREAD_POOL_SIZE", min(_available_cpus() * 8, 256)))
+
+# Horodatage ISO mis en cache, rafraîchi par une tâche de fond (granularité 100 ms)
+_NOW_ISO = datetime.now().isoformat()
+
+async def _refresh_clock(interval: float = 0.1):
+    """Met à jour l'horodatage partagé au lieu d'un datetime.now() par requête"""
+    global _NOW_ISO
+    while True:
+        await asyncio.sleep(interval)
+        _NOW_ISO = datetime.now().isoformat()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage/arrêt : dimensionne les pools de threads (anyio + asyncio)"""
+    # Pool anyio utilisé par FastAPI pour les routes def (40 threads par défaut)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = THREAD_POOL_SIZE
+    
+    # Executor par défaut d'asyncio (asyncio.to_thread / run_in_executor)
+    executor = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="iln")
+    asyncio.get_running_loop().set_default_executor(executor)
+    
+    # Préchauffage : le premier appel réel ne paie pas l'initialisation à froid
+    iln_proof.warmup()
+    
+    # Les lectures /proc de psutil sont amorties hors du chemin des requêtes
+    metrics_task = asyncio.create_task(iln_proof.refresh_metrics_forever())
+    clock_task = asyncio.create_task(_refresh_clock())
+    
+    yield
+    
+    # Arrêt propre des tâches de fond avant de fermer l'executor qu'elles utilisent
+    for task in (clock_task, metrics_task):
+        task.cancel()
+    for task in (clock_task, metrics_task):
+        with suppress(asyncio.CancelledError):
+            await task
+    executor.shutdown(wait=False)
+
 app = FastAPI(
     title="ILN + Docker Proof of Concept",
     description="Prouve que Docker peut gérer les dépendances ILN problématiques",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-@app.get("/")
-async def dashboard():
-    """Dashboard de démonstration"""
-    return HTMLResponse("""
+# HTML statique : encodé et haché une seule fois au chargement du module
+DASHBOARD_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -261,53 +359,151 @@ ${JSON.stringify(result.docker_proof, null, 2)}
         </script>
     </body>
     </html>
-    """)
+    """
+
+_DASHBOARD_BYTES = DASHBOARD_HTML.encode("utf-8")
+_DASHBOARD_DIGEST = hashlib.md5(_DASHBOARD_BYTES).hexdigest()
+_DASHBOARD_ETAG = f'"{_DASHBOARD_DIGEST}"'
+_DASHBOARD_HEADERS = {
+    "ETag": _DASHBOARD_ETAG,
+    "Cache-Control": "public, max-age=300",
+    "Vary": "Accept-Encoding"
+}
+
+# Variante précompressée : aucune compression à l'exécution
+_DASHBOARD_GZ = gzip.compress(_DASHBOARD_BYTES, compresslevel=9)
+_DASHBOARD_GZ_HEADERS = {
+    **_DASHBOARD_HEADERS,
+    "ETag": f'"{_DASHBOARD_DIGEST}-gzip"',
+    "Content-Encoding": "gzip"
+}
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Vrai si Accept-Encoding autorise gzip (q > 0), explicitement ou via *"""
+    wildcard = False
+    for token in accept_encoding.split(","):
+        coding, _, params = token.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            return q > 0
+        if coding == "*":
+            wildcard = q > 0
+    return wildcard
+
+@app.get("/", response_class=HTMLResponse)
+async def dashboard(request: Request):
+    """Dashboard de démonstration"""
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers = _DASHBOARD_GZ_HEADERS
+        body = _DASHBOARD_GZ
+    else:
+        headers = _DASHBOARD_HEADERS
+        body = _DASHBOARD_BYTES
+    
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="text/html", headers=headers)
+
+# Preuve que Docker gère les dépendances (fixée au démarrage, construite une fois)
+_DOCKER_PROOF = {
+    "problematic_deps_loaded": iln_proof.problematic_dependencies,
+    "total_dependencies": iln_proof.total_dependencies,
+    "architecture": "Single Dockerfile (no requirements.txt)",
+    "render_deployment": "Compatible",
+    "concept_validated": iln_proof.concept_validated
+}
 
-@app.post("/test-iln", response_model=TestResponse)
+# TestResponse ne sert qu'au schéma OpenAPI : pas de revalidation en sortie
+@app.post("/test-iln", responses={200: {"model": TestResponse}})
 async def test_iln_concept(request: TestRequest):
     """Test principal du concept ILN + Docker"""
     
     essence_result = iln_proof.simulate_iln_essence(request.data, request.essence_type)
     system_metrics = iln_proof.get_system_metrics()
     
-    # Preuve que Docker gère les dépendances
-    docker_proof = {
-        "problematic_deps_loaded": iln_proof.problematic_dependencies,
-        "total_dependencies": sum(iln_proof.problematic_dependencies.values()),
-        "architecture": "Single Dockerfile (no requirements.txt)",
-        "render_deployment": "Compatible",
-        "concept_validated": all(iln_proof.problematic_dependencies.values())
-    }
-    
-    return TestResponse(
-        status="success",
-        essence_result=essence_result,
-        system_metrics=system_metrics,
-        docker_proof=docker_proof,
-        timestamp=datetime.now().isoformat()
-    )
+    return ORJSONResponse({
+        "status": "success",
+        "essence_result": essence_result,
+        "system_metrics": system_metrics,
+        "docker_proof": _DOCKER_PROOF,
+        "timestamp": _NOW_ISO
+    })
+
+# Contenu entièrement fixé au démarrage : sérialisé une seule fois
+_HEALTH_BYTES = orjson.dumps({
+    "status": "healthy",
+    "architecture": "ILN + Docker",
+    "dependencies_managed_by": "Dockerfile",
+    "requirements_txt": "Not needed",
+    "problematic_deps_working": iln_proof.problematic_dependencies,
+    "concept_proven": True
+})
+_HEALTH_ETAG = f'"{hashlib.sha1(_HEALTH_BYTES).hexdigest()}"'
+_HEALTH_HEADERS = {"ETag": _HEALTH_ETAG}
 
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check avec preuve des capacités"""
-    return {
-        "status": "healthy",
-        "architecture": "ILN + Docker",
-        "dependencies_managed_by": "Dockerfile",
-        "requirements_txt": "Not needed",
-        "problematic_deps_working": iln_proof.problematic_dependencies,
-        "concept_proven": True
-    }
+    if request.headers.get("if-none-match") == _HEALTH_ETAG:
+        return Response(status_code=304, headers=_HEALTH_HEADERS)
+    return Response(content=_HEALTH_BYTES, media_type="application/json", headers=_HEALTH_HEADERS)
 
-@app.get("/api-test")
-async def api_test():
-    """Test des capacités réseau (requests fonctionne)"""
+HTTPBIN_URL = "https://httpbin.org/json"
+
+# Cache TTL de la réponse externe (URL -> (expiration monotonic, payload))
+_API_TEST_TTL = 30.0
+_api_test_cache: Dict[str, tuple] = {}
+# Appel sortant en cours par URL (single-flight) : les requêtes concurrentes l'attendent
+_api_test_inflight: Dict[str, asyncio.Task] = {}
+
+@functools.lru_cache(maxsize=None)
+def _http_session():
+    """Session requests partagée : connexions TCP/TLS réutilisées d'un appel à l'autre"""
+    # Déjà chargé par la sonde de dépendances ; import local pour garder le module optionnel
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection
+    
+    class KeepAliveAdapter(HTTPAdapter):
+        """Adaptateur qui ajoute le keep-alive TCP aux options par défaut d'urllib3 (dont TCP_NODELAY)"""
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+            super().init_poolmanager(*args, **kwargs)
+    
+    session = requests.Session()
+    session.mount("https://", KeepAliveAdapter(pool_connections=10, pool_maxsize=10))
+    return session
+
+def _fetch_httpbin():
+    """Appel réseau bloquant, exécuté dans le pool de threads"""
+    return _http_session().get(HTTPBIN_URL, timeout=5)
+
+def _cached_api_test():
+    """Réponse en cache si encore valide, sinon None"""
+    cached = _api_test_cache.get(HTTPBIN_URL)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+async def _refresh_api_test() -> Dict[str, Any]:
+    """Appel externe unique : met en cache un succès, renvoie aussi le payload d'erreur"""
     try:
-        response = requests.get("https://httpbin.org/json", timeout=5)
-        return {
+        # requests est bloquant : on le sort de la boucle d'événements
+        response = await asyncio.to_thread(_fetch_httpbin)
+        payload = {
             "status": "success",
             "message": "Requests library works via Docker!",
-            "external_api_response": response.json(),
+            "external_api_response": orjson.loads(response.content),
             "proof": "Docker managed dependency functioning"
         }
     except Exception as e:
@@ -315,12 +511,46 @@ async def api_test():
             "status": "error",
             "message": f"Error: {str(e)}"
         }
+    
+    _api_test_cache[HTTPBIN_URL] = (time.monotonic() + _API_TEST_TTL, payload)
+    return payload
+
+@app.get("/api-test")
+async def api_test():
+    """Test des capacités réseau (requests fonctionne)"""
+    payload = _cached_api_test()
+    if payload is not None:
+        return payload
+    
+    # Un seul appel sortant à la fois : tous les appelants partagent le même résultat (erreur comprise)
+    task = _api_test_inflight.get(HTTPBIN_URL)
+    if task is None:
+        task = asyncio.create_task(_refresh_api_test())
+        _api_test_inflight[HTTPBIN_URL] = task
+        task.add_done_callback(lambda _: _api_test_inflight.pop(HTTPBIN_URL, None))
+    
+    # shield : la déconnexion d'un client n'annule pas l'appel partagé
+    return await asyncio.shield(task)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    print(f"🌌 Starting ILN + Docker Proof of Concept on port {port}")
+    # WEB_CONCURRENCY : variable conventionnelle (Render, gunicorn). Un seul worker par défaut :
+    # dans le conteneur, le nombre de cœurs de l'hôte ne reflète pas la limite CPU/mémoire
+    workers = int(os.environ.get("WEB_CONCURRENCY", os.environ.get("WEB_WORKERS", 1)))
+    print(f"🌌 Starting ILN + Docker Proof of Concept on port {port} ({workers} workers)")
     print(f"🐳 Dependencies managed by: Dockerfile")
     print(f"📝 Requirements.txt: Not needed")
     print(f"✅ Problematic deps loaded: {iln_proof.problematic_dependencies}")
     
-    uvicorn.run("app:app", host="0.0.0.0", port=port)
\ No newline at end of file
+    # Boucle libuv (uvloop) + parseur HTTP en C (httptools), workers configurables,
+    # sans access log (une écriture formatée par requête)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        log_level="warning",
+        access_log=False
+    )
\ No newline at end of file